@@ -1,11 +1,46 @@
+import ast
 import inspect
+import linecache
+import os
+import re
+import sys
 import warnings
-from typing import TypeVar, Union, get_args, get_origin, Callable, Any, Optional, cast
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cache, lru_cache
+from types import UnionType
+from typing import Annotated, Any, TypeVar, Union, get_args, get_origin
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 T = TypeVar('T', bound=BaseModel)
 
+# JSON schema validation keywords paired with their Pydantic Field() names, which
+# are also the attribute names of the constraint objects in FieldInfo.metadata.
+# Constraints are displayed in this order.
+_CONSTRAINT_ORDER = (
+    ("minLength", "min_length"),
+    ("maxLength", "max_length"),
+    ("minimum", "ge"),
+    ("maximum", "le"),
+    ("pattern", "pattern"),
+)
+
+
+@dataclass(frozen=True, slots=True)
+class _LLMMeta:
+    """Precomputed LLM documentation for a decorated model.
+    
+    Only doc and validation_doc are used for formatting; header, lines and
+    field_names are kept for introspection.
+    """
+    
+    header: str
+    lines: tuple[str, ...]
+    doc: str
+    validation_doc: str
+    field_names: frozenset[str]
+
 
 def prompt_schema(cls: type[T], *, warn_undocumented: bool = True) -> type[T]:
     """
@@ -18,69 +53,39 @@ def prompt_schema(cls: type[T], *, warn_undocumented: bool = True) -> type[T]:
     Returns:
         The decorated class with format_for_llm method
     """
+    meta = _build_meta(cls, warn_undocumented)
+    cls.__llm_meta__ = meta  # type: ignore[attr-defined]
+    doc = meta.doc
     
-    def format_for_llm_impl(cls_param: type[T], include_validation: bool = False) -> str:
-        """Format this model's fields and docstrings for LLM prompts."""
-        lines = [f"{cls_param.__name__}:"]
-        
-        # Get JSON schema to extract validation info if needed
-        json_schema = cls_param.model_json_schema() if include_validation else {}
-        properties = json_schema.get("properties", {})
-        
-        # Iterate through each field
-        for name, field_info in cls_param.model_fields.items():
-            # Get the field's type
-            field_type = _get_field_type_name(field_info)
-            
-            # Get docstring for the field
-            docstring = _extract_field_docstring(cls_param, name)
-            
-            # Warn if field is not documented
-            if warn_undocumented and not docstring:
-                warnings.warn(
-                    f"Field '{name}' in {cls_param.__name__} has no docstring. "
-                    "Add a docstring for better LLM prompts.",
-                    UserWarning,
-                    stacklevel=2
-                )
-            
-            # Determine if field is optional
-            is_optional = not field_info.is_required()
-            optional_str = ", optional" if is_optional else ""
-            
-            # Format the field line
-            field_line = f"- {name} ({field_type}{optional_str}): {docstring}"
-            
-            # Add validation info if requested
-            if include_validation and name in properties:
-                field_schema = properties[name]
-                
-                constraints = []
-                # Common validation keywords
-                for key in ["minLength", "maxLength", "minimum", "maximum", "pattern"]:
-                    if key in field_schema:
-                        # Convert camelCase to snake_case for display
-                        display_key = "".join(
-                            ["_" + c.lower() if c.isupper() else c for c in key]
-                        ).lstrip("_")
-                        # Special case mappings
-                        if display_key == "minimum":
-                            display_key = "ge"
-                        elif display_key == "maximum":
-                            display_key = "le"
-                        elif display_key == "min_length":
-                            display_key = "min_length" 
-                        elif display_key == "max_length":
-                            display_key = "max_length"
-                        
-                        constraints.append(f"{display_key}: {field_schema[key]}")
-                
-                if constraints:
-                    field_line += f" [Constraints: {', '.join(constraints)}]"
+    # Subclasses add their own fields, so they are rendered on first use and
+    # stored on the subclass itself, which keeps no reference to it here
+    def _subclass_meta(cls_param: type[T]) -> _LLMMeta:
+        """Get the precomputed documentation for a subclass."""
+        # Read the subclass's own __dict__ so the inherited meta is skipped
+        sub_meta: _LLMMeta | None = cls_param.__dict__.get("__llm_meta__")
+        if sub_meta is None:
+            sub_meta = _build_meta(cls_param, warn_undocumented)
+            cls_param.__llm_meta__ = sub_meta  # type: ignore[attr-defined]
+        return sub_meta
+    
+    if meta.validation_doc is not meta.doc:
+        def format_for_llm_impl(
+            cls_param: type[T], include_validation: bool = False
+        ) -> str:
+            """Format this model's fields and docstrings for LLM prompts."""
+            cls_meta = meta if cls_param is cls else _subclass_meta(cls_param)
+            return cls_meta.validation_doc if include_validation else cls_meta.doc
+    else:
+        def format_for_llm_impl(
+            cls_param: type[T], include_validation: bool = False
+        ) -> str:
+            """Format this model's fields and docstrings for LLM prompts."""
+            # No field has constraints, so both variants are identical
+            if cls_param is cls:
+                return doc
             
-            lines.append(field_line)
-        
-        return "\n".join(lines)
+            sub_meta = _subclass_meta(cls_param)
+            return sub_meta.validation_doc if include_validation else sub_meta.doc
     
     # Add the format_for_llm method to the class using the classmethod decorator
     setattr(cls, "format_for_llm", classmethod(format_for_llm_impl))  # type: ignore
@@ -88,66 +93,279 @@ def prompt_schema(cls: type[T], *, warn_undocumented: bool = True) -> type[T]:
     return cls
 
 
-def _extract_field_docstring(cls: type, field_name: str) -> str:
-    """Extract docstring for a field from class source code."""
+def _build_meta(cls: type[BaseModel], warn_undocumented: bool) -> _LLMMeta:
+    """Render the LLM documentation for a model class."""
+    # Model fields are fixed once the class is created, so both outputs are
+    # rendered here and formatting does no introspection or source parsing.
+    # Field(description=...) needs no source parsing, so only read the class
+    # source when some field relies on a docstring.
+    fields = cls.model_fields
+    docstrings: dict[str, str] = {}
+    if not all(field_info.description for field_info in fields.values()):
+        # Inherited fields are documented in their base class bodies
+        for base in reversed(cls.__mro__):
+            if base is not BaseModel and issubclass(base, BaseModel):
+                docstrings.update(_extract_field_docstrings(base))
+    
+    lines: list[str] = []
+    validation_lines: list[str] = []
+    has_constraints = False
+    for name, field_info in fields.items():
+        # Field and type names recur across models, so share one copy of each
+        name = sys.intern(name)
+        
+        # Get the field's type
+        field_type = sys.intern(_get_field_type_name(field_info))
+        
+        # Get docstring for the field
+        docstring = field_info.description or docstrings.get(name, "")
+        
+        # Warn if field is not documented
+        if warn_undocumented and not docstring:
+            warnings.warn(
+                f"Field '{name}' in {cls.__name__} has no docstring. "
+                "Add a docstring for better LLM prompts.",
+                UserWarning,
+                stacklevel=3
+            )
+        
+        # Determine if field is optional
+        is_optional = not field_info.is_required()
+        optional_str = ", optional" if is_optional else ""
+        
+        # Format the field line
+        parts = ["- ", name, " (", field_type, optional_str, "): ", docstring]
+        field_line = "".join(parts)
+        lines.append(field_line)
+        
+        # Add validation info
+        constraints = _get_field_constraints(field_info)
+        if constraints:
+            has_constraints = True
+            parts.extend((" [Constraints: ", ", ".join(constraints), "]"))
+            field_line = "".join(parts)
+        validation_lines.append(field_line)
+    
+    header = f"{cls.__name__}:"
+    doc = "\n".join((header, *lines))
+    return _LLMMeta(
+        header=header,
+        lines=tuple(lines),
+        doc=doc,
+        validation_doc=(
+            "\n".join((header, *validation_lines)) if has_constraints else doc
+        ),
+        field_names=frozenset(fields),
+    )
+
+
+def _extract_field_docstrings(cls: type) -> dict[str, str]:
+    """Extract docstrings for all fields from class source code in one pass."""
+    docstrings: dict[str, str] = {}
+    class_def = _find_class_def(cls)
+    if class_def is None:
+        return docstrings
+    
+    # A field docstring is a string expression directly following the field
+    body = class_def.body
+    for node, next_node in zip(body, body[1:]):
+        if isinstance(node, ast.AnnAssign):
+            targets: list[ast.expr] = [node.target]
+        elif isinstance(node, ast.Assign):
+            targets = node.targets
+        else:
+            continue
+        
+        if not (
+            isinstance(next_node, ast.Expr)
+            and isinstance(next_node.value, ast.Constant)
+            and isinstance(next_node.value.value, str)
+        ):
+            continue
+        
+        for target in targets:
+            if isinstance(target, ast.Name):
+                docstrings[target.id] = next_node.value.value.strip()
+    
+    return docstrings
+
+
+def _find_class_def(cls: type) -> ast.ClassDef | None:
+    """Find the AST node defining a class in its module's parsed source."""
     try:
-        source = inspect.getsource(cls)
+        filename = inspect.getsourcefile(cls)
+        if filename is None:
+            return None
         
-        # Look for field definition
-        patterns = [
-            f"{field_name}:", 
-            f"{field_name} :",
-            f"{field_name} ="
-        ]
+        try:
+            mtime: float | None = os.path.getmtime(filename)
+        except OSError:
+            # Source only available through the module's loader (zipimport,
+            # zipapps, eggs), which does not change while the process runs
+            mtime = None
         
-        field_pos = -1
-        for pattern in patterns:
-            pos = source.find(pattern)
-            if pos != -1:
-                field_pos = pos
-                break
-                
-        if field_pos == -1:
-            return ""
-            
-        # Look for triple-quoted docstring
-        for quote in ['"""', "'''"]:
-            doc_start = source.find(quote, field_pos)
-            if doc_start != -1:
-                doc_end = source.find(quote, doc_start + 3)
-                if doc_end != -1:
-                    return source[doc_start + 3:doc_end].strip()
-                
+        class_defs = _module_class_defs(filename, mtime, cls.__module__)
     except Exception:
-        pass
-        
-    return ""
+        return None
+    
+    candidates = class_defs.get(cls.__qualname__)
+    if not candidates:
+        return None
+    
+    # Disambiguate redefinitions of the same name (Python 3.13+ only)
+    first_line = getattr(cls, "__firstlineno__", None)
+    for class_def in candidates:
+        decorator_lines = [node.lineno for node in class_def.decorator_list]
+        if first_line == min([class_def.lineno, *decorator_lines]):
+            return class_def
+    
+    return candidates[0]
+
+
+# Bounded so that parsed modules are not kept alive for the whole process;
+# decorated classes are usually defined module by module
+@lru_cache(maxsize=32)
+def _module_class_defs(
+    filename: str, mtime: float | None, module_name: str
+) -> dict[str, list[ast.ClassDef]]:
+    """Parse a source file once and index its class definitions by qualname.
+    
+    The modification time is part of the cache key so edited and reloaded
+    modules are parsed again.
+    """
+    # The module globals let linecache load source through the module's loader
+    # when the file is not on disk
+    module = sys.modules.get(module_name)
+    module_globals = vars(module) if module is not None else None
+    linecache.checkcache(filename)
+    tree = ast.parse("".join(linecache.getlines(filename, module_globals)))
+    
+    class_defs: dict[str, list[ast.ClassDef]] = {}
+    _index_class_defs(tree, "", class_defs)
+    return class_defs
+
+
+def _index_class_defs(
+    node: ast.AST, prefix: str, class_defs: dict[str, list[ast.ClassDef]]
+) -> None:
+    """Recursively record class definitions under their __qualname__."""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.ClassDef):
+            qualname = f"{prefix}{child.name}"
+            class_defs.setdefault(qualname, []).append(child)
+            _index_class_defs(child, f"{qualname}.", class_defs)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            _index_class_defs(child, f"{prefix}{child.name}.<locals>.", class_defs)
+        else:
+            _index_class_defs(child, prefix, class_defs)
+
+
+def _get_field_constraints(field_info: Any) -> list[str]:
+    """Get display strings for a field's validation constraints."""
+    # Pydantic normalizes Field() arguments, Annotated constraints and con*()
+    # types into FieldInfo.metadata, so the JSON schema is usually not needed
+    values: dict[str, Any] = {}
+    for item in field_info.metadata:
+        for _, display_key in _CONSTRAINT_ORDER:
+            value = getattr(item, display_key, None)
+            if value is not None:
+                values[display_key] = value
+    
+    if not values:
+        # An unhashable annotation cannot be cached, so skip the fallback
+        with suppress(TypeError):
+            values = dict(_annotation_constraints(field_info.annotation))
+    
+    # json_schema_extra is merged into the JSON schema last, so it wins
+    extra = field_info.json_schema_extra
+    if isinstance(extra, dict):
+        for key, display_key in _CONSTRAINT_ORDER:
+            if key in extra:
+                values[display_key] = extra[key]
+    
+    # A zero minimum length (e.g. from annotated_types.Len) constrains nothing
+    if values.get("min_length") == 0:
+        del values["min_length"]
+    
+    constraints = []
+    for _, display_key in _CONSTRAINT_ORDER:
+        if display_key in values:
+            value = values[display_key]
+            if isinstance(value, re.Pattern):
+                value = value.pattern
+            constraints.append(f"{display_key}: {value}")
+    
+    return constraints
+
+
+@cache
+def _annotation_constraints(annotation: Any) -> tuple[tuple[str, Any], ...]:
+    """Get constraints defined by the annotation itself rather than the field.
+    
+    This covers constraints FieldInfo.metadata does not hold, such as
+    Optional[Annotated[str, MaxLen(3)]] or custom types with their own
+    JSON schema, by building a JSON schema for the annotation alone.
+    """
+    # Look through Optional, we handle optionality separately
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if (origin is Union or origin is UnionType) and type(None) in args:
+        non_none = [arg for arg in args if arg is not type(None)]
+        if len(non_none) != 1:
+            return ()
+        annotation = non_none[0]
+        origin = get_origin(annotation)
+    
+    # Only Annotated types and custom types can carry constraints here
+    if origin is not Annotated and not (
+        isinstance(annotation, type)
+        and hasattr(annotation, "__get_pydantic_json_schema__")
+        and not issubclass(annotation, BaseModel)
+    ):
+        return ()
+    
+    try:
+        json_schema = TypeAdapter(annotation).json_schema()
+    except Exception:
+        return ()
+    
+    return tuple(
+        (display_key, json_schema[key])
+        for key, display_key in _CONSTRAINT_ORDER
+        if key in json_schema
+    )
 
 
 def _get_field_type_name(field_info: Any) -> str:
     """Get a user-friendly type name from a field."""
-    annotation = field_info.annotation
+    try:
+        return _type_name_for(field_info.annotation)
+    except TypeError:
+        # Annotation is not hashable, so it cannot be cached
+        return _type_name_for.__wrapped__(field_info.annotation)
+
+
+@cache
+def _type_name_for(annotation: Any) -> str:
+    """Get a user-friendly type name from a type annotation."""
+    origin = get_origin(annotation)
+    args = get_args(annotation)
     
-    # Handle Optional types
-    if get_origin(annotation) is Union and type(None) in get_args(annotation):
+    # Handle Optional types, both Optional[X] and X | None
+    if (origin is Union or origin is UnionType) and type(None) in args:
+        # Remove Optional wrapper, we handle optionality separately
+        annotation = next(arg for arg in args if arg is not type(None))
+        origin = get_origin(annotation)
         args = get_args(annotation)
-        for arg in args:
-            if arg is not type(None):
-                # Remove Optional wrapper, we handle optionality separately
-                annotation = arg
-                break
     
     # Handle basic types
     if isinstance(annotation, type):
         return annotation.__name__
     
     # Handle parameterized generics
-    origin = get_origin(annotation)
     if origin is not None:
-        args = get_args(annotation)
-        
         # Handle list types
-        if origin is list or str(origin).endswith("list"):
+        if origin is list:
             arg_type = args[0]
             inner_type = ""
             
@@ -162,7 +380,6 @@ def _get_field_type_name(field_info: Any) -> str:
                 
                 # Extract class name from ForwardRef if needed
                 if "ForwardRef" in inner_type:
-                    import re
                     match = re.search(r"ForwardRef\('([^']+)'\)", inner_type)
                     if match:
                         inner_type = match.group(1)
@@ -170,7 +387,7 @@ def _get_field_type_name(field_info: Any) -> str:
             return f"list[{inner_type}]"
         
         # Handle dict types
-        if origin is dict or str(origin).endswith("dict"):
+        if origin is dict:
             key_type = args[0]
             val_type = args[1]
             
@@ -199,7 +416,6 @@ def _get_field_type_name(field_info: Any) -> str:
             else:
                 arg_str = str(arg).replace("typing.", "")
                 if "ForwardRef" in arg_str:
-                    import re
                     match = re.search(r"ForwardRef\('([^']+)'\)", arg_str)
                     if match:
                         arg_str = match.group(1)
@@ -212,7 +428,6 @@ def _get_field_type_name(field_info: Any) -> str:
     
     # Clean up ForwardRef representation
     if "ForwardRef" in type_str:
-        import re
         match = re.search(r"ForwardRef\('([^']+)'\)", type_str)
         if match:
             return match.group(1)
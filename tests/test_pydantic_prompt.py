@@ -1,7 +1,15 @@
-from typing import Optional
+import gc
+import importlib
+import sys
+import weakref
+import zipfile
+from typing import Annotated, Optional
 
-from pydantic import BaseModel, Field
-from pydantic_prompt import prompt_schema
+import pytest
+from annotated_types import Len
+from pydantic import BaseModel, Field, StringConstraints, create_model
+
+from pydantic_prompt import core, prompt_schema
 
 
 def test_basic_docstring_extraction():
@@ -16,6 +24,7 @@ def test_basic_docstring_extraction():
     output = BasicModel.format_for_llm()
     assert "name (str): The user's name" in output
     assert "age (int): Age in years" in output
+    assert BasicModel.format_for_llm(include_validation=True) == output
 
 
 def test_optional_fields():
@@ -32,6 +41,16 @@ def test_optional_fields():
     assert "optional (str, optional):" in output
 
 
+def test_pipe_optional_fields():
+    @prompt_schema
+    class PipeOptionalModel(BaseModel):
+        tags: list[str] | None = None
+        """Optional tags"""
+
+    output = PipeOptionalModel.format_for_llm()
+    assert "tags (list[str], optional): Optional tags" in output
+
+
 def test_validation_rules():
     @prompt_schema
     class ValidationModel(BaseModel):
@@ -51,6 +70,67 @@ def test_validation_rules():
     assert "Constraints: ge: 0, le: 120" in validation_output
 
 
+def test_validation_rules_without_json_schema_keys():
+    @prompt_schema
+    class CollectionModel(BaseModel):
+        tags: list[str] = Field(max_length=3)
+        """Item tags"""
+
+        user_name: str = Field(alias="userName", min_length=2)
+        """User name"""
+
+        count: int = Field(json_schema_extra={"minimum": 3})
+        """Item count"""
+
+        code: Annotated[str, Len(0, 3)]
+        """Short code"""
+
+    output = CollectionModel.format_for_llm(include_validation=True)
+    # Constraints come from field metadata, so list lengths (maxItems in the
+    # JSON schema) and aliased fields are included
+    assert "tags (list[str]): Item tags [Constraints: max_length: 3]" in output
+    assert "user_name (str): User name [Constraints: min_length: 2]" in output
+    # Constraints given only as JSON schema extras are still shown
+    assert "count (int): Item count [Constraints: ge: 3]" in output
+    # A zero minimum length is not a constraint
+    assert "code (str): Short code [Constraints: max_length: 3]" in output
+
+
+def test_annotated_validation_rules():
+    @prompt_schema
+    class AnnotatedModel(BaseModel):
+        code: Annotated[str, StringConstraints(max_length=8, pattern=r"^[A-Z]+$")]
+        """Uppercase code"""
+
+    output = AnnotatedModel.format_for_llm(include_validation=True)
+    assert (
+        "code (str): Uppercase code [Constraints: max_length: 8, pattern: ^[A-Z]+$]"
+        in output
+    )
+
+
+def test_optional_annotated_validation_rules():
+    @prompt_schema
+    class OptionalAnnotatedModel(BaseModel):
+        nickname: Optional[Annotated[str, StringConstraints(max_length=3)]] = None
+        """Short nickname"""
+
+    output = OptionalAnnotatedModel.format_for_llm(include_validation=True)
+    assert "Short nickname [Constraints: max_length: 3]" in output
+
+
+def test_field_description():
+    @prompt_schema
+    class DescribedModel(BaseModel):
+        name: str = Field(description="The user's name")
+        age: int
+        """Age in years"""
+
+    output = DescribedModel.format_for_llm()
+    assert "name (str): The user's name" in output
+    assert "age (int): Age in years" in output
+
+
 def test_nested_models():
     @prompt_schema
     class Address(BaseModel):
@@ -70,10 +150,128 @@ def test_nested_models():
 
     output = Person.format_for_llm()
     assert "name (str): Person's name" in output
-    
-    # More flexible assertion that checks for the important parts
-    assert "addresses (list[Address], optional): List of addresses" in output or (
-        "addresses (list[" in output and 
-        "Address" in output and 
-        "optional): List of addresses" in output
-    )
\ No newline at end of file
+    assert "addresses (list[Address], optional): List of addresses" in output
+
+
+def test_output_is_cached():
+    @prompt_schema
+    class CachedModel(BaseModel):
+        name: str = Field(min_length=1)
+        """User name"""
+
+    assert CachedModel.format_for_llm() is CachedModel.format_for_llm()
+    assert CachedModel.format_for_llm(include_validation=True) is (
+        CachedModel.format_for_llm(include_validation=True)
+    )
+    assert CachedModel.format_for_llm() != CachedModel.format_for_llm(
+        include_validation=True
+    )
+
+
+def test_undocumented_field_warns_at_decoration():
+    with pytest.warns(UserWarning, match="Field 'age' in Undocumented"):
+
+        @prompt_schema
+        class Undocumented(BaseModel):
+            name: str
+            """User name"""
+
+            age: int
+
+    assert "- age (int): " in Undocumented.format_for_llm()
+
+
+def test_docstring_belongs_to_preceding_field():
+    with pytest.warns(UserWarning, match="'undocumented'"):
+
+        @prompt_schema
+        class MixedModel(BaseModel):
+            undocumented: str
+            count: int = 0
+            '''Number of items'''
+
+    output = MixedModel.format_for_llm()
+    assert "- undocumented (str): \n" in output
+    assert "- count (int, optional): Number of items" in output
+
+
+def test_subclass_of_decorated_model():
+    @prompt_schema
+    class Base(BaseModel):
+        a: int
+        """A doc"""
+
+    class Child(Base):
+        b: str = Field(min_length=2)
+        """B doc"""
+
+    assert Base.format_for_llm() == "Base:\n- a (int): A doc"
+    assert Child.format_for_llm() == "Child:\n- a (int): A doc\n- b (str): B doc"
+    assert Child.format_for_llm(include_validation=True) == (
+        "Child:\n- a (int): A doc\n- b (str): B doc [Constraints: min_length: 2]"
+    )
+    assert Child.__llm_meta__ is not Base.__llm_meta__
+
+    # Subclasses built at runtime are not kept alive by the decorator
+    dynamic = create_model("Dynamic", __base__=Base, c=(int, Field(description="C")))
+    assert dynamic.format_for_llm() == "Dynamic:\n- a (int): A doc\n- c (int): C"
+    dynamic_ref = weakref.ref(dynamic)
+    del dynamic
+    gc.collect()
+    assert dynamic_ref() is None
+
+
+MODULE_SOURCE = '''
+from pydantic import BaseModel
+from pydantic_prompt import prompt_schema
+
+
+@prompt_schema
+class First(BaseModel):
+    x: int
+    """X doc"""
+
+
+@prompt_schema
+class Second(BaseModel):
+    y: int
+    """Y doc"""
+
+
+def make_local():
+    @prompt_schema
+    class Local(BaseModel):
+        z: int
+        """Z doc"""
+
+    return Local
+'''
+
+
+def test_module_source_parsed_once(tmp_path, monkeypatch):
+    (tmp_path / "pp_shared_module.py").write_text(MODULE_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "pp_shared_module", raising=False)
+
+    misses = core._module_class_defs.cache_info().misses
+    module = importlib.import_module("pp_shared_module")
+    local = module.make_local()
+    monkeypatch.delitem(sys.modules, "pp_shared_module", raising=False)
+
+    assert core._module_class_defs.cache_info().misses == misses + 1
+    assert module.First.format_for_llm() == "First:\n- x (int): X doc"
+    assert module.Second.format_for_llm() == "Second:\n- y (int): Y doc"
+    assert local.__qualname__ == "make_local.<locals>.Local"
+    assert local.format_for_llm() == "Local:\n- z (int): Z doc"
+
+
+def test_source_from_zip_import(tmp_path, monkeypatch):
+    archive = tmp_path / "models.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("pp_zipped_module.py", MODULE_SOURCE)
+    monkeypatch.syspath_prepend(str(archive))
+    monkeypatch.delitem(sys.modules, "pp_zipped_module", raising=False)
+
+    module = importlib.import_module("pp_zipped_module")
+    monkeypatch.delitem(sys.modules, "pp_zipped_module", raising=False)
+    assert module.First.format_for_llm() == "First:\n- x (int): X doc"